@@ -4,17 +4,171 @@ QENEX Website Deployment via Hetzner DNS
 Deploys the perfected QENEX website with proper DNS configuration
 """
 
+import asyncio
 import json
-import requests
-import time
+import logging
+import dns.asyncresolver
+import dns.exception
+import httpx
+import orjson
 import os
 import sys
+from ipaddress import IPv4Address
+from pathlib import Path
 from typing import Dict, List, Optional
 
+logging.basicConfig(level=logging.INFO, format='%(message)s')
+logger = logging.getLogger(__name__)
+
 # Hetzner DNS API configuration
 HETZNER_API_KEY = os.getenv('HETZNER_DNS_API', 'WKIVxzsSTWAbxnxo0dpwfstehNzAvKqb')
 HETZNER_API_URL = 'https://dns.hetzner.com/api/v1'
 DOMAIN = 'qenex.ai'
+ZONE_CACHE_PATH = os.path.expanduser('~/.cache/qenex/hetzner_zone_id.json')
+
+# Dedicated resolver with a short timeout instead of the system resolver
+_RESOLVER = dns.asyncresolver.Resolver(configure=False)
+_RESOLVER.nameservers = ['1.1.1.1', '8.8.8.8']
+_RESOLVER.timeout = 2
+_RESOLVER.lifetime = 2
+
+# Hetzner's authoritative nameservers; polled directly to bypass recursive caches
+HETZNER_NAMESERVERS = ['hydrogen.ns.hetzner.com', 'oxygen.ns.hetzner.com', 'helium.ns.hetzner.de']
+
+# DNS records to configure; a value of None is filled with the server IP
+_DESIRED_RECORDS_TEMPLATE = [
+    {
+        'type': 'A',
+        'name': '@',
+        'value': None,
+        'ttl': 3600
+    },
+    {
+        'type': 'A',
+        'name': 'www',
+        'value': None,
+        'ttl': 3600
+    },
+    {
+        'type': 'TXT',
+        'name': '@',
+        'value': 'QENEX Financial OS - Perfection Achieved',
+        'ttl': 3600
+    },
+    {
+        'type': 'MX',
+        'name': '@',
+        'value': '10 mail.qenex.ai',
+        'ttl': 3600
+    }
+]
+
+# nginx configuration for the website; depends only on DOMAIN
+_NGINX_CONFIG = f"""
+server {{
+    listen 80;
+    listen [::]:80;
+    server_name {DOMAIN} www.{DOMAIN};
+    
+    # Redirect to HTTPS
+    return 301 https://$server_name$request_uri;
+}}
+
+server {{
+    listen 443 ssl http2;
+    listen [::]:443 ssl http2;
+    server_name {DOMAIN} www.{DOMAIN};
+    
+    # SSL Configuration
+    ssl_certificate /etc/letsencrypt/live/{DOMAIN}/fullchain.pem;
+    ssl_certificate_key /etc/letsencrypt/live/{DOMAIN}/privkey.pem;
+    ssl_protocols TLSv1.2 TLSv1.3;
+    ssl_ciphers HIGH:!aNULL:!MD5;
+    ssl_prefer_server_ciphers on;
+    
+    # Security Headers
+    add_header Strict-Transport-Security "max-age=31536000; includeSubDomains" always;
+    add_header X-Frame-Options "SAMEORIGIN" always;
+    add_header X-Content-Type-Options "nosniff" always;
+    add_header X-XSS-Protection "1; mode=block" always;
+    
+    # Root directory
+    root /var/www/qenex;
+    index index.html;
+    
+    # Gzip compression
+    gzip on;
+    gzip_types text/plain text/css application/json application/javascript text/xml application/xml application/xml+rss text/javascript;
+    
+    location / {{
+        try_files $uri $uri/ =404;
+    }}
+    
+    # API proxy (if needed)
+    location /api {{
+        proxy_pass https://abdulrahman305.github.io/qenex-docs
+        proxy_http_version 1.1;
+        proxy_set_header Upgrade $http_upgrade;
+        proxy_set_header Connection 'upgrade';
+        proxy_set_header Host $host;
+        proxy_cache_bypass $http_upgrade;
+    }}
+}}
+"""
+
+def _error_body(response: httpx.Response) -> str:
+    """Bounded, charset-agnostic excerpt of an error response body"""
+    return response.content[:512].decode('utf-8', 'replace')
+
+class RetryTransport(httpx.AsyncHTTPTransport):
+    """HTTP transport that retries transient failures with exponential backoff"""
+    
+    RETRY_STATUSES = frozenset({429, 500, 502, 503, 504})
+    RETRY_METHODS = frozenset({'GET', 'HEAD', 'POST', 'PUT', 'DELETE'})
+    
+    def __init__(self, total: int = 5, backoff_factor: float = 0.5, **kwargs):
+        # Connection failures are retried by the underlying transport
+        kwargs.setdefault('retries', total)
+        super().__init__(**kwargs)
+        self.total = total
+        self.backoff_factor = backoff_factor
+        
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        attempt = 0
+        while True:
+            response = await super().handle_async_request(request)
+            if (attempt >= self.total
+                    or request.method not in self.RETRY_METHODS
+                    or response.status_code not in self.RETRY_STATUSES):
+                return response
+            
+            # Honour Retry-After when the server sends one
+            retry_after = response.headers.get('Retry-After', '')
+            delay = (float(retry_after) if retry_after.isdigit()
+                     else self.backoff_factor * (2 ** attempt))
+            await response.aclose()
+            await asyncio.sleep(delay)
+            attempt += 1
+
+# Console banners, shown only when attached to a terminal
+_BANNER_START = """
+╔══════════════════════════════════════════════════════════╗
+║           QENEX WEBSITE DEPLOYMENT SYSTEM                ║
+║                 Perfection Delivered                     ║
+╚══════════════════════════════════════════════════════════╝
+"""
+
+_BANNER_DONE = """
+╔══════════════════════════════════════════════════════════╗
+║                  DEPLOYMENT COMPLETE                     ║
+║                                                          ║
+║  Website: https://abdulrahman305.github.io/qenex-docs                              ║
+║  Status: PERFECTION ACHIEVED                            ║
+║                                                          ║
+║  The QENEX Financial OS website is now live and         ║
+║  delivering absolute perfection to the world.           ║
+╚══════════════════════════════════════════════════════════╝
+"""
 
 class HetznerDNSDeployer:
     """Manages DNS deployment for QENEX website"""
@@ -25,30 +179,88 @@ class HetznerDNSDeployer:
             'Content-Type': 'application/json'
         }
         self.zone_id = None
+        self.server_ip = None
+        self.client: Optional[httpx.AsyncClient] = None
+        
+    async def __aenter__(self) -> 'HetznerDNSDeployer':
+        # One pooled HTTP/2 client shared by every API call, so concurrent
+        # requests multiplex over the same keep-alive connection
+        self.client = httpx.AsyncClient(
+            headers=self.headers,
+            transport=RetryTransport(
+                http2=True,
+                limits=httpx.Limits(max_connections=20, max_keepalive_connections=10)
+            )
+        )
+        return self
+    
+    async def __aexit__(self, exc_type, exc, tb) -> None:
+        await self.client.aclose()
+        self.client = None
         
-    def get_zone_id(self) -> Optional[str]:
+    def _load_cached_zone_id(self) -> Optional[str]:
+        """Return the zone ID persisted by a previous run, if any"""
+        try:
+            with open(ZONE_CACHE_PATH) as f:
+                return json.load(f).get(DOMAIN)
+        except (OSError, ValueError):
+            return None
+    
+    def _save_zone_id(self, zone_id: str) -> None:
+        """Persist the zone ID so later runs can skip the /zones lookup"""
+        try:
+            cache = {}
+            if os.path.exists(ZONE_CACHE_PATH):
+                with open(ZONE_CACHE_PATH) as f:
+                    cache = json.load(f)
+            cache[DOMAIN] = zone_id
+            os.makedirs(os.path.dirname(ZONE_CACHE_PATH), exist_ok=True)
+            with open(ZONE_CACHE_PATH, 'w') as f:
+                json.dump(cache, f)
+        except (OSError, ValueError) as e:
+            logger.warning("Could not cache zone ID: %s", e)
+    
+    def _invalidate_zone_cache(self) -> None:
+        """Drop a cached zone ID that the API no longer recognises"""
+        try:
+            with open(ZONE_CACHE_PATH) as f:
+                cache = json.load(f)
+            if cache.pop(DOMAIN, None) is not None:
+                with open(ZONE_CACHE_PATH, 'w') as f:
+                    json.dump(cache, f)
+        except (OSError, ValueError):
+            pass
+    
+    async def get_zone_id(self) -> Optional[str]:
         """Get the zone ID for the domain"""
+        cached_zone_id = self._load_cached_zone_id()
+        if cached_zone_id:
+            return cached_zone_id
+        
         try:
-            response = requests.get(
+            # Filter server-side so the response holds at most one zone
+            response = await self.client.get(
                 f'{HETZNER_API_URL}/zones',
-                headers=self.headers
+                params={'name': DOMAIN, 'per_page': 1}
             )
             
             if response.status_code == 200:
-                zones = response.json().get('zones', [])
-                for zone in zones:
-                    if zone['name'] == DOMAIN:
-                        return zone['id']
-                print(f"✓ Domain {DOMAIN} found in Hetzner DNS")
+                zones = orjson.loads(response.content).get('zones', [])
+                if zones:
+                    logger.info("Domain %s found in Hetzner DNS", DOMAIN)
+                    self._save_zone_id(zones[0]['id'])
+                    return zones[0]['id']
+            elif response.status_code == 404:
+                logger.error("Domain %s not found in Hetzner DNS", DOMAIN)
             else:
-                print(f"✗ Failed to fetch zones: {response.status_code}")
+                logger.error("Failed to fetch zones: %s", response.status_code)
                 
-        except Exception as e:
-            print(f"✗ Error connecting to Hetzner API: {e}")
+        except (httpx.HTTPError, orjson.JSONDecodeError) as e:
+            logger.error("Error connecting to Hetzner API: %s", e)
             
         return None
     
-    def create_zone(self) -> Optional[str]:
+    async def create_zone(self) -> Optional[str]:
         """Create a new DNS zone if it doesn't exist"""
         try:
             data = {
@@ -56,108 +268,134 @@ class HetznerDNSDeployer:
                 'ttl': 86400
             }
             
-            response = requests.post(
+            response = await self.client.post(
                 f'{HETZNER_API_URL}/zones',
-                headers=self.headers,
-                json=data
+                content=orjson.dumps(data)
             )
             
             if response.status_code in [200, 201]:
-                zone = response.json().get('zone', {})
-                print(f"✓ Created new DNS zone for {DOMAIN}")
+                zone = orjson.loads(response.content).get('zone', {})
+                logger.info("Created new DNS zone for %s", DOMAIN)
+                if zone.get('id'):
+                    self._save_zone_id(zone['id'])
                 return zone.get('id')
             else:
-                print(f"✗ Failed to create zone: {response.text}")
+                logger.error("Failed to create zone: %s", _error_body(response))
                 
-        except Exception as e:
-            print(f"✗ Error creating zone: {e}")
+        except (httpx.HTTPError, orjson.JSONDecodeError) as e:
+            logger.error("Error creating zone: %s", e)
             
         return None
     
-    def update_dns_records(self, zone_id: str, server_ip: str) -> bool:
+    async def update_dns_records(self, zone_id: str, server_ip: str) -> bool:
         """Update DNS records for the website"""
         
         # DNS records to configure
         records = [
-            {
-                'type': 'A',
-                'name': '@',
-                'value': server_ip,
-                'ttl': 3600
-            },
-            {
-                'type': 'A', 
-                'name': 'www',
-                'value': server_ip,
-                'ttl': 3600
-            },
-            {
-                'type': 'TXT',
-                'name': '@',
-                'value': 'QENEX Financial OS - Perfection Achieved',
-                'ttl': 3600
-            },
-            {
-                'type': 'MX',
-                'name': '@',
-                'value': '10 mail.qenex.ai',
-                'ttl': 3600
-            }
+            dict(record, value=server_ip) if record['value'] is None else record
+            for record in _DESIRED_RECORDS_TEMPLATE
         ]
         
-        success_count = 0
+        existing_records = []
         
         # First, get existing records
         try:
-            response = requests.get(
+            response = await self.client.get(
                 f'{HETZNER_API_URL}/records',
-                headers=self.headers,
                 params={'zone_id': zone_id}
             )
             
             if response.status_code == 200:
-                existing_records = response.json().get('records', [])
-                
-                # Delete conflicting A records
-                for record in existing_records:
-                    if record['type'] == 'A' and record['name'] in ['@', 'www']:
-                        delete_response = requests.delete(
-                            f"{HETZNER_API_URL}/records/{record['id']}",
-                            headers=self.headers
-                        )
-                        if delete_response.status_code == 200:
-                            print(f"✓ Deleted existing {record['type']} record for {record['name']}")
+                existing_records = orjson.loads(response.content).get('records', [])
+            elif response.status_code == 404:
+                self._invalidate_zone_cache()
                             
-        except Exception as e:
-            print(f"⚠ Warning: Could not check existing records: {e}")
+        except (httpx.HTTPError, orjson.JSONDecodeError) as e:
+            logger.warning("Could not check existing records: %s", e)
+        
+        # Diff desired vs existing. A records hold one address per name: the
+        # first existing one is updated in place and any extras are deleted.
+        # TXT/MX records coexist with others at the same name (SPF,
+        # verification, backup MX), so they only match on identical value.
+        existing_a: Dict[str, List[Dict]] = {}
+        existing_by_value = {}
+        for record in existing_records:
+            if record['type'] == 'A':
+                existing_a.setdefault(record['name'], []).append(record)
+            else:
+                existing_by_value[(record['name'], record['type'], record['value'])] = record
         
-        # Create new records
+        updates = []
+        creates = []
+        deletes = []
         for record in records:
-            try:
-                data = {
-                    'zone_id': zone_id,
-                    'type': record['type'],
-                    'name': record['name'],
-                    'value': record['value'],
-                    'ttl': record['ttl']
-                }
-                
-                response = requests.post(
-                    f'{HETZNER_API_URL}/records',
-                    headers=self.headers,
-                    json=data
-                )
-                
-                if response.status_code in [200, 201]:
-                    print(f"✓ Created {record['type']} record: {record['name']}.{DOMAIN}")
-                    success_count += 1
-                else:
-                    print(f"✗ Failed to create {record['type']} record: {response.text}")
-                    
-            except Exception as e:
-                print(f"✗ Error creating record: {e}")
+            data = {
+                'zone_id': zone_id,
+                'type': record['type'],
+                'name': record['name'],
+                'value': record['value'],
+                'ttl': record['ttl']
+            }
+            if record['type'] == 'A':
+                matches = existing_a.get(record['name'], [])
+                existing = matches[0] if matches else None
+                deletes.extend(matches[1:])
+            else:
+                existing = existing_by_value.get((record['name'], record['type'], record['value']))
+            if existing:
+                updates.append({'id': existing['id'], **data})
+            else:
+                creates.append(data)
+        
+        results = await asyncio.gather(
+            self._bulk_records('PUT', updates),
+            self._bulk_records('POST', creates),
+            *(self._delete_record(record) for record in deletes)
+        )
+        success_count = results[0] + results[1]
         
-        return success_count == len(records)
+        return success_count == len(records) and all(results[2:])
+    
+    async def _delete_record(self, record: Dict) -> bool:
+        """Delete a single record (the API has no bulk delete)"""
+        try:
+            response = await self.client.delete(f"{HETZNER_API_URL}/records/{record['id']}")
+            if response.status_code == 200:
+                logger.info("Deleted stale %s record: %s.%s (%s)",
+                            record['type'], record['name'], DOMAIN, record['value'])
+                return True
+            logger.error("Failed to delete record: %s", _error_body(response))
+        except httpx.HTTPError as e:
+            logger.error("Error deleting record: %s", e)
+        return False
+    
+    async def _bulk_records(self, method: str, records: List[Dict]) -> int:
+        """Create (POST) or update (PUT) records in a single bulk request"""
+        if not records:
+            return 0
+        
+        verb, action = ('update', 'Updated') if method == 'PUT' else ('create', 'Created')
+        try:
+            response = await self.client.request(
+                method,
+                f'{HETZNER_API_URL}/records/bulk',
+                content=orjson.dumps({'records': records})
+            )
+            
+            if response.status_code in [200, 201]:
+                applied = orjson.loads(response.content).get('records', [])
+                for record in applied:
+                    logger.info("%s %s record: %s.%s", action, record['type'], record['name'], DOMAIN)
+                return len(applied)
+            elif response.status_code == 404:
+                self._invalidate_zone_cache()
+                logger.error("Zone not found, cleared cached zone ID: %s", _error_body(response))
+            else:
+                logger.error("Failed to %s records: %s", verb, _error_body(response))
+                
+        except (httpx.HTTPError, orjson.JSONDecodeError) as e:
+            logger.error("Error in bulk record %s: %s", method, e)
+        return 0
     
     def configure_ssl(self) -> Dict[str, str]:
         """Configure SSL certificate settings"""
@@ -169,187 +407,164 @@ class HetznerDNSDeployer:
             'key_type': 'RSA-4096'
         }
         
-        print("✓ SSL Configuration prepared:")
-        for key, value in ssl_config.items():
-            print(f"  - {key}: {value}")
+        logger.info("SSL configuration prepared: %s", ssl_config)
             
         return ssl_config
     
-    def deploy_website(self, server_ip: str = '91.99.223.180') -> bool:
+    async def deploy_website(self, server_ip: str = '91.99.223.180') -> bool:
         """Main deployment function"""
-        print("=" * 60)
-        print("QENEX Website DNS Deployment")
-        print("=" * 60)
+        # Reject a malformed IP up front instead of once per record server-side
+        try:
+            IPv4Address(server_ip)
+        except ValueError:
+            logger.error("Invalid server IP: %s", server_ip)
+            return False
+        
+        self.server_ip = server_ip
+        logger.info("QENEX Website DNS Deployment")
         
         # Step 1: Get or create zone
-        self.zone_id = self.get_zone_id()
+        self.zone_id = await self.get_zone_id()
         if not self.zone_id:
-            print(f"Creating new zone for {DOMAIN}...")
-            self.zone_id = self.create_zone()
+            logger.info("Creating new zone for %s", DOMAIN)
+            self.zone_id = await self.create_zone()
             
         if not self.zone_id:
-            print("✗ Failed to get or create DNS zone")
+            logger.error("Failed to get or create DNS zone")
             return False
         
-        print(f"✓ Using zone ID: {self.zone_id}")
+        logger.info("Using zone ID: %s", self.zone_id)
         
         # Step 2: Update DNS records
-        print("\nConfiguring DNS records...")
-        if not self.update_dns_records(self.zone_id, server_ip):
-            print("⚠ Some DNS records failed to create")
+        logger.info("Configuring DNS records")
+        if not await self.update_dns_records(self.zone_id, server_ip):
+            logger.warning("Some DNS records failed to create")
         
         # Step 3: Configure SSL
-        print("\nConfiguring SSL...")
+        logger.info("Configuring SSL")
         ssl_config = self.configure_ssl()
         
         # Step 4: Deployment summary
-        print("\n" + "=" * 60)
-        print("DEPLOYMENT SUMMARY")
-        print("=" * 60)
-        print(f"✓ Domain: {DOMAIN}")
-        print(f"✓ Server IP: {server_ip}")
-        print(f"✓ DNS Zone: {self.zone_id}")
-        print(f"✓ SSL: Configured with Let's Encrypt")
-        print(f"✓ Status: LIVE")
-        print("\n📌 DNS propagation may take up to 48 hours")
-        print(f"🌐 Website will be accessible at: https://{DOMAIN}")
-        print("=" * 60)
+        logger.info(
+            "Deployment summary: domain=%s server_ip=%s zone_id=%s ssl=%s status=LIVE",
+            DOMAIN, server_ip, self.zone_id, ssl_config['provider']
+        )
+        logger.info("DNS propagation may take up to 48 hours; website will be "
+                    "accessible at: https://%s", DOMAIN)
         
         return True
     
-    def verify_deployment(self) -> bool:
-        """Verify the deployment is working"""
-        print("\nVerifying deployment...")
-        
+    async def wait_for_propagation(self, timeout: float = 10.0, interval: float = 0.5) -> bool:
+        """Poll Hetzner's authoritative nameservers until the A record is live"""
         try:
-            # Check DNS resolution
-            import socket
-            ip = socket.gethostbyname(DOMAIN)
-            print(f"✓ DNS resolves to: {ip}")
+            answers = await asyncio.gather(
+                *(_RESOLVER.resolve(ns, 'A') for ns in HETZNER_NAMESERVERS)
+            )
+        except dns.exception.DNSException as e:
+            logger.warning("Could not resolve Hetzner nameservers: %s", e)
+            return False
+        
+        resolver = dns.asyncresolver.Resolver(configure=False)
+        resolver.nameservers = [rr.address for answer in answers for rr in answer]
+        resolver.timeout = 1
+        resolver.lifetime = 1
+        
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + timeout
+        while True:
+            try:
+                answer = await resolver.resolve(DOMAIN, 'A')
+                if any(rr.address == self.server_ip for rr in answer):
+                    logger.info("Authoritative nameservers serve %s -> %s", DOMAIN, self.server_ip)
+                    return True
+            except dns.exception.DNSException:
+                pass
             
-            # Check HTTP response
-            response = requests.get(f'http://{DOMAIN}', timeout=5)
-            if response.status_code == 200:
-                print(f"✓ Website is responding (HTTP {response.status_code})")
-                return True
-            else:
-                print(f"⚠ Website returned status: {response.status_code}")
-                
-        except socket.gaierror:
-            print("⚠ DNS not yet propagated")
-        except requests.exceptions.RequestException as e:
-            print(f"⚠ Website not yet accessible: {e}")
-        except Exception as e:
-            print(f"⚠ Verification error: {e}")
+            if loop.time() + interval > deadline:
+                return False
+            await asyncio.sleep(interval)
+    
+    async def verify_deployment(self) -> bool:
+        """Verify the deployment is working"""
+        logger.info("Verifying deployment")
+        
+        # Resolve DNS and probe HTTP concurrently rather than back to back.
+        # The probe uses its own bare client: the API client carries the
+        # Hetzner token, which must never reach the site or its redirects
+        async with httpx.AsyncClient(timeout=5, follow_redirects=True) as probe:
+            dns_result, http_result = await asyncio.gather(
+                _RESOLVER.resolve(DOMAIN, 'A'),
+                probe.head(f'http://{DOMAIN}'),
+                return_exceptions=True
+            )
+        
+        # Check DNS resolution
+        if isinstance(dns_result, dns.exception.DNSException):
+            logger.warning("DNS not yet propagated")
+            return False
+        if isinstance(dns_result, Exception):
+            logger.warning("Verification error: %s", dns_result)
+            return False
+        logger.info("DNS resolves to: %s", dns_result[0].address)
+        
+        # Check HTTP response
+        if isinstance(http_result, httpx.HTTPError):
+            logger.warning("Website not yet accessible: %s", http_result)
+        elif isinstance(http_result, Exception):
+            logger.warning("Verification error: %s", http_result)
+        elif http_result.status_code == 200:
+            logger.info("Website is responding (HTTP %s)", http_result.status_code)
+            return True
+        else:
+            logger.warning("Website returned status: %s", http_result.status_code)
             
         return False
 
 def create_nginx_config() -> str:
     """Generate nginx configuration for the website"""
-    nginx_config = f"""
-server {{
-    listen 80;
-    listen [::]:80;
-    server_name {DOMAIN} www.{DOMAIN};
-    
-    # Redirect to HTTPS
-    return 301 https://$server_name$request_uri;
-}}
-
-server {{
-    listen 443 ssl http2;
-    listen [::]:443 ssl http2;
-    server_name {DOMAIN} www.{DOMAIN};
-    
-    # SSL Configuration
-    ssl_certificate /etc/letsencrypt/live/{DOMAIN}/fullchain.pem;
-    ssl_certificate_key /etc/letsencrypt/live/{DOMAIN}/privkey.pem;
-    ssl_protocols TLSv1.2 TLSv1.3;
-    ssl_ciphers HIGH:!aNULL:!MD5;
-    ssl_prefer_server_ciphers on;
-    
-    # Security Headers
-    add_header Strict-Transport-Security "max-age=31536000; includeSubDomains" always;
-    add_header X-Frame-Options "SAMEORIGIN" always;
-    add_header X-Content-Type-Options "nosniff" always;
-    add_header X-XSS-Protection "1; mode=block" always;
-    
-    # Root directory
-    root /var/www/qenex;
-    index index.html;
-    
-    # Gzip compression
-    gzip on;
-    gzip_types text/plain text/css application/json application/javascript text/xml application/xml application/xml+rss text/javascript;
-    
-    location / {{
-        try_files $uri $uri/ =404;
-    }}
-    
-    # API proxy (if needed)
-    location /api {{
-        proxy_pass https://abdulrahman305.github.io/qenex-docs
-        proxy_http_version 1.1;
-        proxy_set_header Upgrade $http_upgrade;
-        proxy_set_header Connection 'upgrade';
-        proxy_set_header Host $host;
-        proxy_cache_bypass $http_upgrade;
-    }}
-}}
-"""
-    
-    # Save nginx config
-    config_path = '/tmp/qenex-audit/nginx-qenex.conf'
-    with open(config_path, 'w') as f:
-        f.write(nginx_config)
+    # Save nginx config, creating the target directory if needed
+    config_path = Path('/tmp/qenex-audit/nginx-qenex.conf')
+    config_path.parent.mkdir(parents=True, exist_ok=True)
+    config_path.write_text(_NGINX_CONFIG)
     
-    print(f"✓ Nginx configuration saved to: {config_path}")
-    return config_path
+    logger.info("Nginx configuration saved to: %s", config_path)
+    return str(config_path)
 
-def main():
+async def run_deployment():
     """Main deployment function"""
-    print("""
-╔══════════════════════════════════════════════════════════╗
-║           QENEX WEBSITE DEPLOYMENT SYSTEM                ║
-║                 Perfection Delivered                     ║
-╚══════════════════════════════════════════════════════════╝
-    """)
+    # Banner art only when attached to a terminal
+    if sys.stdout.isatty():
+        sys.stdout.write(_BANNER_START)
     
     # Initialize deployer
-    deployer = HetznerDNSDeployer()
-    
-    # Deploy website
-    if deployer.deploy_website():
-        print("\n✅ DEPLOYMENT SUCCESSFUL")
-        
-        # Create nginx config
-        print("\nGenerating server configuration...")
-        nginx_config = create_nginx_config()
-        
-        # Verify deployment
-        print("\nWaiting 5 seconds before verification...")
-        time.sleep(5)
-        
-        if deployer.verify_deployment():
-            print("\n🎉 WEBSITE IS LIVE AT: https://abdulrahman305.github.io/qenex-docs)
-        else:
-            print("\n📌 DNS propagation in progress. Check again in a few hours.")
+    async with HetznerDNSDeployer() as deployer:
+        # Deploy website
+        if await deployer.deploy_website():
+            logger.info("Deployment successful")
             
-        print("""
-╔══════════════════════════════════════════════════════════╗
-║                  DEPLOYMENT COMPLETE                     ║
-║                                                          ║
-║  Website: https://abdulrahman305.github.io/qenex-docs                              ║
-║  Status: PERFECTION ACHIEVED                            ║
-║                                                          ║
-║  The QENEX Financial OS website is now live and         ║
-║  delivering absolute perfection to the world.           ║
-╚══════════════════════════════════════════════════════════╝
-        """)
-    else:
-        print("\n❌ DEPLOYMENT FAILED")
-        print("Please check the API key and network connectivity")
-        sys.exit(1)
+            # Create nginx config
+            logger.info("Generating server configuration")
+            nginx_config = create_nginx_config()
+            
+            # Verify deployment
+            logger.info("Waiting for authoritative DNS before verification")
+            await deployer.wait_for_propagation()
+            
+            if await deployer.verify_deployment():
+                logger.info("Website is live at: https://abdulrahman305.github.io/qenex-docs")
+            else:
+                logger.info("DNS propagation in progress. Check again in a few hours.")
+                
+            if sys.stdout.isatty():
+                sys.stdout.write(_BANNER_DONE)
+        else:
+            logger.error("Deployment failed")
+            logger.error("Please check the API key and network connectivity")
+            sys.exit(1)
+
+def main():
+    """Entry point"""
+    asyncio.run(run_deployment())
 
 if __name__ == '__main__':
     main()
\ No newline at end of file
@@ -5,37 +5,35 @@ Real-time monitoring, alerting, and observability for banking operations
 """
 
 import asyncio
-import aiohttp
-from prometheus_client import Counter, Histogram, Gauge, Summary, Info
+import ast
+import base64
+from prometheus_client import Histogram, Gauge, Summary
 from prometheus_client.exposition import start_http_server
-from influxdb_client import InfluxDBClient, Point
-from influxdb_client.client.write_api import SYNCHRONOUS
+from influxdb_client import InfluxDBClient, Point, WritePrecision
+from influxdb_client.client.write_api import WriteApi, WriteOptions
 import structlog
-from typing import Dict, List, Optional, Any, Callable
+from typing import Dict, List, Optional, Any, Callable, Tuple
 from dataclasses import dataclass, field
-from datetime import datetime, timedelta
+from datetime import datetime
 from enum import Enum
-import json
-import yaml
-from pathlib import Path
-import re
+import orjson
+import time
+import heapq
 from collections import deque
-import statistics
 import numpy as np
-from scipy import stats
-import smtplib
-from email.mime.text import MIMEText
-from email.mime.multipart import MIMEMultipart
-import asyncio_mqtt
 import websockets
-from aiogram import Bot
-import slack_sdk.web.async_client as slack
-from twilio.rest import Client as TwilioClient
-import pandas as pd
-from sklearn.ensemble import IsolationForest
+
+try:
+    from crick import TDigest
+except ImportError:  # percentiles fall back to np.percentile over the window
+    TDigest = None
 
 logger = structlog.get_logger()
 
+# Streaming percentile sketches: one t-digest per 10s bucket, an hour kept
+SKETCH_BUCKET_NS = 10 * 1_000_000_000
+SKETCH_BUCKETS = 360
+
 
 class AlertSeverity(Enum):
     """Alert severity levels"""
@@ -70,6 +68,48 @@ class Alert:
     last_triggered: Optional[datetime] = None
     trigger_count: int = 0
     active: bool = False
+    # Filled from condition by compile_condition
+    compiled: Optional[Callable[[Dict[str, float], float], bool]] = field(default=None, repr=False)
+    inputs: frozenset = frozenset()
+
+
+# Syntax allowed in alert conditions: arithmetic, comparisons and boolean
+# logic over metric names, numbers and `threshold`
+_CONDITION_NODES = (
+    ast.Expression, ast.BoolOp, ast.And, ast.Or, ast.UnaryOp, ast.Not,
+    ast.USub, ast.UAdd, ast.BinOp, ast.Add, ast.Sub, ast.Mult, ast.Div,
+    ast.Mod, ast.Pow, ast.Compare, ast.Gt, ast.GtE, ast.Lt, ast.LtE,
+    ast.Eq, ast.NotEq, ast.Name, ast.Load, ast.Constant
+)
+
+
+class _MetricLookup(ast.NodeTransformer):
+    """Rewrite metric names in a condition as lookups in `m`"""
+    
+    def visit_Name(self, node: ast.Name) -> ast.AST:
+        if node.id == 'threshold':
+            return node
+        return ast.Subscript(value=ast.Name('m', ast.Load()),
+                             slice=ast.Constant(node.id), ctx=ast.Load())
+
+
+def compile_condition(condition: str) -> Tuple[Callable[[Dict[str, float], float], bool], frozenset]:
+    """Compile an alert condition into a function of (metrics, threshold)
+    
+    Also returns the metric names the condition reads, so callers can
+    skip it when any of them has not been reported.
+    """
+    tree = ast.parse(condition, mode='eval')
+    inputs = set()
+    for node in ast.walk(tree):
+        if not isinstance(node, _CONDITION_NODES):
+            raise ValueError(f"Unsupported alert condition: {condition!r}")
+        if isinstance(node, ast.Name) and node.id != 'threshold':
+            inputs.add(node.id)
+    
+    body = ast.unparse(_MetricLookup().visit(tree.body))
+    code = compile(f"lambda m, threshold: {body}", '<alert condition>', 'eval')
+    return eval(code, {'__builtins__': {}}), frozenset(inputs)
 
 
 @dataclass
@@ -82,11 +122,82 @@ class MetricPoint:
     fields: Dict[str, Any] = field(default_factory=dict)
 
 
+class MetricBuffer:
+    """Ring of one metric's most recent values and their ns timestamps
+    
+    Points are expected in roughly increasing time order, so each of the
+    two ring segments is sorted and a window start is a binary search.
+    """
+    
+    def __init__(self, size: int):
+        self.values = np.empty(size, dtype=np.float64)
+        self.timestamps = np.empty(size, dtype=np.int64)
+        self.head = 0  # Points written so far; next slot is head % size
+        self.sketches: deque = deque(maxlen=SKETCH_BUCKETS)  # (bucket, TDigest)
+    
+    def append(self, value: float, timestamp_ns: int):
+        i = self.head % len(self.values)
+        self.values[i] = value
+        self.timestamps[i] = timestamp_ns
+        self.head += 1
+        
+        if TDigest is not None:
+            bucket = timestamp_ns // SKETCH_BUCKET_NS
+            if not self.sketches or self.sketches[-1][0] != bucket:
+                self.sketches.append((bucket, TDigest()))
+            self.sketches[-1][1].add(value)
+    
+    def quantiles(self, cutoff_ns: int, qs: List[float]) -> np.ndarray:
+        """Quantiles from the sketch buckets overlapping the window
+        
+        The oldest bucket may reach up to one bucket before cutoff_ns.
+        """
+        first = cutoff_ns // SKETCH_BUCKET_NS
+        merged = TDigest()
+        merged.merge(*[sketch for bucket, sketch in self.sketches if bucket >= first])
+        return merged.quantile(np.asarray(qs))
+    
+    def since(self, head: int) -> np.ndarray:
+        """Values written after the buffer's head was at head, oldest first;
+        points already overwritten are lost"""
+        size = len(self.values)
+        count = min(self.head - head, size)
+        if count <= 0:
+            return self.values[:0]
+        start = (self.head - count) % size
+        end = self.head % size or size
+        if start < end:
+            return self.values[start:end]
+        return np.concatenate((self.values[start:], self.values[:end]))
+    
+    def window(self, cutoff_ns: int) -> np.ndarray:
+        """Values recorded at or after cutoff_ns, oldest first"""
+        size = len(self.values)
+        if self.head <= size:
+            start = np.searchsorted(self.timestamps[:self.head], cutoff_ns)
+            return self.values[start:self.head]
+        
+        # Wrapped: [split:] holds the older points, [:split] the newer
+        split = self.head % size
+        start = split + np.searchsorted(self.timestamps[split:], cutoff_ns)
+        if start == size:
+            start = np.searchsorted(self.timestamps[:split], cutoff_ns)
+            return self.values[start:split]
+        return np.concatenate((self.values[start:], self.values[:split]))
+
+
 class MetricsCollector:
     """Collects and aggregates system metrics"""
     
     def __init__(self, buffer_size: int = 10000):
-        self.metrics_buffer: deque = deque(maxlen=buffer_size)
+        # Per-metric rings of buffer_size points each
+        self.buffer_size = buffer_size
+        self.buffers: Dict[str, MetricBuffer] = {}
+        self.latest: Dict[str, float] = {}
+        
+        # Bound set/observe of each Prometheus label child already resolved,
+        # keyed by (metric name, label values)
+        self._label_children: Dict[Tuple[str, Tuple[str, ...]], Callable[[float], None]] = {}
         self.aggregation_window = 60  # seconds
         
         # Define core metrics
@@ -144,94 +255,208 @@ class MetricsCollector:
             ['currency', 'product']
         )
     
+    # Prometheus label names, in declaration order, of the metrics that
+    # record_fast forwards
+    LABEL_NAMES = {
+        'transaction_rate': ('type', 'status'),
+        'response_time': ('endpoint', 'method'),
+        'error_rate': ('service', 'error_type')
+    }
+    
     def record_metric(self, metric: MetricPoint):
         """Record a metric point"""
-        self.metrics_buffer.append(metric)
+        labels = tuple(metric.tags[name] for name in self.LABEL_NAMES.get(metric.name, ()))
+        self.record_fast(metric.name, metric.value,
+                         int(metric.timestamp.timestamp() * 1e9), labels)
+    
+    def record_fast(self, name: str, value: float, timestamp_ns: int,
+                    labels: Tuple[str, ...] = ()):
+        """Record a value without building a MetricPoint
+        
+        labels are the Prometheus label values in LABEL_NAMES order.
+        """
+        buffer = self.buffers.get(name)
+        if buffer is None:
+            buffer = self.buffers[name] = MetricBuffer(self.buffer_size)
+        buffer.append(value, timestamp_ns)
+        self.latest[name] = value
         
         # Update Prometheus metrics
-        if metric.name == 'transaction_rate':
-            self.transaction_rate.labels(**metric.tags).set(metric.value)
-        elif metric.name == 'response_time':
-            self.response_time.labels(**metric.tags).observe(metric.value)
-        elif metric.name == 'error_rate':
-            self.error_rate.labels(**metric.tags).set(metric.value)
+        if name in self.LABEL_NAMES:
+            update = self._label_children.get((name, labels))
+            if update is None:
+                update = self._label_children[(name, labels)] = self._label_child(name, labels)
+            update(value)
+    
+    def _label_child(self, name: str, labels: Tuple[str, ...]) -> Callable[[float], None]:
+        """Resolve the Prometheus child for a label set to its update method"""
+        if name == 'transaction_rate':
+            return self.transaction_rate.labels(*labels).set
+        elif name == 'response_time':
+            return self.response_time.labels(*labels).observe
+        return self.error_rate.labels(*labels).set
     
     def get_aggregated_metrics(self, metric_name: str, 
                               window_seconds: int = 300) -> Dict[str, float]:
         """Get aggregated metrics over time window"""
-        cutoff_time = datetime.now() - timedelta(seconds=window_seconds)
-        
-        relevant_metrics = [
-            m for m in self.metrics_buffer
-            if m.name == metric_name and m.timestamp >= cutoff_time
-        ]
+        buffer = self.buffers.get(metric_name)
+        if buffer is None:
+            return {}
         
-        if not relevant_metrics:
+        # Wall clock, since ring timestamps come from the points themselves
+        cutoff_ns = time.time_ns() - window_seconds * 1_000_000_000
+        values = buffer.window(cutoff_ns)
+        if not values.size:
             return {}
         
-        values = [m.value for m in relevant_metrics]
+        # All reductions run over one contiguous array; percentiles come
+        # from the streaming sketches when available
+        if TDigest is not None:
+            p50, p95, p99 = buffer.quantiles(cutoff_ns, [0.5, 0.95, 0.99])
+        else:
+            p50, p95, p99 = np.percentile(values, [50, 95, 99])
         
         return {
-            'count': len(values),
-            'mean': statistics.mean(values),
-            'median': statistics.median(values),
-            'stdev': statistics.stdev(values) if len(values) > 1 else 0,
-            'min': min(values),
-            'max': max(values),
-            'p50': np.percentile(values, 50),
-            'p95': np.percentile(values, 95),
-            'p99': np.percentile(values, 99)
+            'count': int(values.size),
+            'mean': float(values.mean()),
+            'median': float(p50),
+            'stdev': float(values.std(ddof=1)) if values.size > 1 else 0,
+            'min': float(values.min()),
+            'max': float(values.max()),
+            'p50': float(p50),
+            'p95': float(p95),
+            'p99': float(p99)
         }
 
 
+def _average_path_length(n_samples: np.ndarray) -> np.ndarray:
+    """Average path length of an unsuccessful BST search over n samples,
+    c(n) in the Isolation Forest paper"""
+    n = np.asarray(n_samples, dtype=np.float64)
+    c = np.zeros_like(n)
+    c[n == 2] = 1.0
+    big = n > 2
+    c[big] = 2.0 * (np.log(n[big] - 1.0) + np.euler_gamma) - 2.0 * (n[big] - 1.0) / n[big]
+    return c
+
+
 class AnomalyDetector:
     """Detect anomalies in metrics using ML"""
     
     def __init__(self):
-        self.models: Dict[str, IsolationForest] = {}
+        self.models: Dict[str, Any] = {}  # IsolationForest per metric
         self.training_data: Dict[str, deque] = {}
         self.anomaly_scores: Dict[str, deque] = {}
         self.min_training_samples = 100
+        
+        # Trained forests keep learning: every refit_interval points they
+        # grow refit_trees trees fitted to the latest window, and start
+        # over once max_estimators is reached
+        self.refit_interval = 500
+        self.refit_trees = 10
+        self.max_estimators = 200
+        self._since_fit: Dict[str, int] = {}
+        
+        # Per metric and tree, the isolation path length of each node
+        # (depth plus c(samples) left unresolved there), so scoring is a
+        # leaf lookup per tree
+        self._path_lengths: Dict[str, List[np.ndarray]] = {}
     
     def train_model(self, metric_name: str, data: List[float]):
-        """Train anomaly detection model for a metric"""
+        """Train, or extend, the anomaly detection model for a metric"""
         if len(data) < self.min_training_samples:
             return
         
-        # Reshape data for sklearn
-        X = np.array(data).reshape(-1, 1)
+        # sklearn is only loaded once some metric has enough data
+        from sklearn.ensemble import IsolationForest
         
-        # Train Isolation Forest
-        model = IsolationForest(
-            contamination=0.1,  # Expected proportion of outliers
-            random_state=42
-        )
-        model.fit(X)
+        # Reshape data for sklearn; its trees compare in float32, so this
+        # also saves the conversion copy on every fit and predict
+        X = np.asarray(data, dtype=np.float32).reshape(-1, 1)
+        
+        # Trees subsample at most 256 points (the Isolation Forest paper's
+        # size, past which accuracy stops improving); sized to the data
+        # below that so sklearn doesn't warn
+        max_samples = min(256, len(X))
+        
+        model = self.models.get(metric_name)
+        if model is not None and model.n_estimators + self.refit_trees <= self.max_estimators:
+            # Warm start keeps the existing trees and fits only the new ones
+            model.n_estimators += self.refit_trees
+            model.max_samples = max_samples
+            model.fit(X)
+        else:
+            # Train Isolation Forest
+            model = IsolationForest(
+                n_estimators=100,
+                max_samples=max_samples,
+                contamination=0.1,  # Expected proportion of outliers
+                bootstrap=False,
+                n_jobs=-1,
+                random_state=42,
+                warm_start=True
+            )
+            model.fit(X)
         
         self.models[metric_name] = model
-        logger.info(f"Trained anomaly model for {metric_name}")
+        self._since_fit[metric_name] = 0
+        self._path_lengths[metric_name] = [
+            self._node_path_lengths(tree.tree_) for tree in model.estimators_
+        ]
+        logger.info(f"Trained anomaly model for {metric_name} "
+                    f"({model.n_estimators} trees)")
+    
+    @staticmethod
+    def _node_path_lengths(tree) -> np.ndarray:
+        """Path length credited to a sample ending in each node"""
+        depth = np.zeros(tree.node_count)
+        level = 0
+        frontier = np.array([0])
+        while frontier.size:
+            depth[frontier] = level
+            children = np.concatenate((tree.children_left[frontier],
+                                       tree.children_right[frontier]))
+            frontier = children[children >= 0]
+            level += 1
+        return depth + _average_path_length(tree.n_node_samples)
+    
+    def _score_samples(self, metric_name: str, X: np.ndarray) -> np.ndarray:
+        """IsolationForest.score_samples from the precomputed path lengths
+        
+        The model's own predict would score everything a second time; an
+        anomaly is a score below model.offset_.
+        """
+        model = self.models[metric_name]
+        depths = np.zeros(len(X))
+        for tree, lengths in zip(model.estimators_, self._path_lengths[metric_name]):
+            depths += lengths[tree.apply(X, check_input=False)]
+        
+        normalizer = _average_path_length([model.max_samples_])[0]
+        return -np.exp2(-depths / (len(model.estimators_) * normalizer))
     
     def detect_anomaly(self, metric_name: str, value: float) -> Tuple[bool, float]:
         """Detect if a value is anomalous"""
+        # Collect training data
+        if metric_name not in self.training_data:
+            self.training_data[metric_name] = deque(maxlen=500)
+        self.training_data[metric_name].append(value)
+        
         if metric_name not in self.models:
-            # Collect training data
-            if metric_name not in self.training_data:
-                self.training_data[metric_name] = deque(maxlen=500)
-            
-            self.training_data[metric_name].append(value)
-            
             # Train model when enough data
             if len(self.training_data[metric_name]) >= self.min_training_samples:
                 self.train_model(metric_name, list(self.training_data[metric_name]))
             
             return False, 0.0
         
+        self._since_fit[metric_name] += 1
+        if self._since_fit[metric_name] >= self.refit_interval:
+            self.train_model(metric_name, list(self.training_data[metric_name]))
+        
         # Predict anomaly
-        X = np.array([[value]])
-        prediction = self.models[metric_name].predict(X)[0]
-        score = self.models[metric_name].score_samples(X)[0]
+        X = np.asarray([[value]], dtype=np.float32)
+        score = self._score_samples(metric_name, X)[0]
         
-        is_anomaly = prediction == -1
+        is_anomaly = bool(score < self.models[metric_name].offset_)
         anomaly_score = abs(score)
         
         # Track scores
@@ -240,6 +465,38 @@ class AnomalyDetector:
         self.anomaly_scores[metric_name].append(anomaly_score)
         
         return is_anomaly, anomaly_score
+    
+    def detect_anomalies(self, metric_name: str,
+                         values: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        """Batch form of detect_anomaly: anomaly mask and scores for many
+        points of one metric, scored in one pass"""
+        training = self.training_data.get(metric_name)
+        if training is None:
+            training = self.training_data[metric_name] = deque(maxlen=500)
+        training.extend(values.tolist())
+        
+        model = self.models.get(metric_name)
+        if model is None:
+            # Train model when enough data
+            if len(training) >= self.min_training_samples:
+                self.train_model(metric_name, list(training))
+            return np.zeros(len(values), dtype=bool), np.zeros(len(values))
+        
+        X = np.asarray(values, dtype=np.float32).reshape(-1, 1)
+        scores = self._score_samples(metric_name, X)
+        is_anomaly = scores < model.offset_
+        anomaly_scores = np.abs(scores)
+        
+        # Track scores
+        if metric_name not in self.anomaly_scores:
+            self.anomaly_scores[metric_name] = deque(maxlen=100)
+        self.anomaly_scores[metric_name].extend(anomaly_scores.tolist())
+        
+        self._since_fit[metric_name] += len(values)
+        if self._since_fit[metric_name] >= self.refit_interval:
+            self.train_model(metric_name, list(training))
+        
+        return is_anomaly, anomaly_scores
 
 
 class AlertManager:
@@ -251,6 +508,11 @@ class AlertManager:
         self.notification_channels: Dict[str, Callable] = {}
         self._load_alert_config(config_path)
         self._setup_notification_channels()
+        
+        # Alerts out of cooldown, and a min-heap of (ready_at_ns, alert_id)
+        # on the monotonic clock for the ones cooling down
+        self._ready: Dict[str, Alert] = dict(self.alerts)
+        self._cooling: List[Tuple[int, str]] = []
     
     def _load_alert_config(self, config_path: str):
         """Load alert configuration from file"""
@@ -314,6 +576,7 @@ class AlertManager:
         ]
         
         for alert in example_alerts:
+            alert.compiled, alert.inputs = compile_condition(alert.condition)
             self.alerts[alert.id] = alert
     
     def _setup_notification_channels(self):
@@ -331,32 +594,38 @@ class AlertManager:
         """Evaluate all alert conditions"""
         triggered_alerts = []
         
-        for alert_id, alert in self.alerts.items():
-            # Skip if in cooldown
-            if alert.last_triggered:
-                cooldown_until = alert.last_triggered + timedelta(seconds=alert.cooldown)
-                if datetime.now() < cooldown_until:
-                    continue
-            
+        # Alerts whose cooldown has run out become ready again
+        now_ns = time.monotonic_ns()
+        while self._cooling and self._cooling[0][0] <= now_ns:
+            _, alert_id = heapq.heappop(self._cooling)
+            self._ready[alert_id] = self.alerts[alert_id]
+        
+        for alert_id, alert in list(self._ready.items()):
             # Evaluate condition
             try:
-                # Simple threshold evaluation (would use expression parser in production)
-                metric_value = metrics.get(alert_id.replace('_', '.'), 0)
-                condition_met = metric_value > alert.threshold
+                # Conditions over metrics that haven't been reported are not met
+                condition_met = alert.inputs <= metrics.keys() and \
+                    alert.compiled(metrics, alert.threshold)
                 
                 if condition_met:
                     alert.active = True
                     alert.trigger_count += 1
+                    # Wall-clock time only for the human-facing record
                     alert.last_triggered = datetime.now()
                     triggered_alerts.append(alert)
                     
+                    # Skipped until its cooldown ends
+                    del self._ready[alert_id]
+                    heapq.heappush(self._cooling,
+                                   (now_ns + alert.cooldown * 1_000_000_000, alert_id))
+                    
                     # Send notifications
                     await self._send_alert_notifications(alert, metrics)
                     
                     # Record in history
                     self.alert_history.append({
                         'alert_id': alert.id,
-                        'timestamp': datetime.now(),
+                        'timestamp': alert.last_triggered,
                         'severity': alert.severity.value,
                         'metrics': metrics.copy()
                     })
@@ -417,20 +686,25 @@ class AlertManager:
 class DashboardServer:
     """Real-time dashboard WebSocket server"""
     
-    def __init__(self, port: int = 8765):
+    def __init__(self, port: int = 8765, client_queue_size: int = 64):
         self.port = port
-        self.clients: set = set()
+        # Each client has its own outgoing queue drained by its own task,
+        # so a slow client only falls behind itself
+        self.clients: Dict[Any, asyncio.Queue] = {}
+        self.client_queue_size = client_queue_size
         self.metrics_cache: Dict[str, Any] = {}
     
     async def handler(self, websocket, path):
         """Handle WebSocket connections"""
-        self.clients.add(websocket)
+        queue: asyncio.Queue = asyncio.Queue(maxsize=self.client_queue_size)
+        self.clients[websocket] = queue
+        sender = asyncio.create_task(self._drain(websocket, queue))
         try:
             # Send initial metrics
-            await websocket.send(json.dumps({
+            queue.put_nowait(orjson.dumps({
                 'type': 'initial',
                 'data': self.metrics_cache
-            }))
+            }, option=orjson.OPT_SERIALIZE_NUMPY).decode())
             
             # Keep connection alive
             async for message in websocket:
@@ -440,24 +714,35 @@ class DashboardServer:
         except websockets.exceptions.ConnectionClosed:
             pass
         finally:
-            self.clients.remove(websocket)
+            del self.clients[websocket]
+            sender.cancel()
+    
+    async def _drain(self, websocket, queue: asyncio.Queue):
+        """Send a client's queued messages in order"""
+        try:
+            while True:
+                await websocket.send(await queue.get())
+        except websockets.exceptions.ConnectionClosed:
+            pass
     
     async def broadcast_metrics(self, metrics: Dict[str, Any]):
         """Broadcast metrics to all connected clients"""
         self.metrics_cache.update(metrics)
         
         if self.clients:
-            message = json.dumps({
+            # Text frames, as before; orjson writes the naive timestamp in
+            # the same ISO form isoformat() did
+            message = orjson.dumps({
                 'type': 'update',
-                'timestamp': datetime.now().isoformat(),
+                'timestamp': datetime.now(),
                 'data': metrics
-            })
+            }, option=orjson.OPT_SERIALIZE_NUMPY).decode()
             
-            # Send to all clients
-            await asyncio.gather(
-                *[client.send(message) for client in self.clients],
-                return_exceptions=True
-            )
+            # Queue for every client; a full queue drops its oldest update
+            for queue in self.clients.values():
+                if queue.full():
+                    queue.get_nowait()
+                queue.put_nowait(message)
     
     async def start(self):
         """Start WebSocket server"""
@@ -475,12 +760,43 @@ class MonitoringSystem:
         self.alert_manager = AlertManager()
         self.dashboard = DashboardServer()
         
-        # InfluxDB client for time-series storage
+        # InfluxDB client for time-series storage, written through one
+        # batching write API
         self.influx_client = None
+        self.write_api: Optional[WriteApi] = None
+        # Newest sketch bucket already stored, per metric
+        self._stored_buckets: Dict[str, int] = {}
+        
+        # Latest aggregator output, reused by the health score while fresh
+        self._last_aggregated: Dict[str, Dict[str, float]] = {}
+        self._last_aggregated_ns = 0
+        
+        # Buffer heads already handed to the anomaly detector
+        self._scanned_heads: Dict[str, int] = {}
         
         # Monitoring tasks
         self.tasks: List[asyncio.Task] = []
         self.running = False
+        
+        self._check_alert_inputs()
+    
+    # Metrics aggregated every tick; alerts read them as <metric>_<stat>
+    AGGREGATED_METRICS = ('transaction_rate', 'response_time', 'error_rate', 'fraud_score')
+    # Keys of MetricsCollector.get_aggregated_metrics
+    AGGREGATE_STATS = ('count', 'mean', 'median', 'stdev', 'min', 'max', 'p50', 'p95', 'p99')
+    
+    def _check_alert_inputs(self):
+        """Warn once, at load, about alerts reading aggregates that are never
+        computed; evaluation skips such alerts without a word"""
+        produced = {f"{name}_{stat}" for name in self.AGGREGATED_METRICS
+                    for stat in self.AGGREGATE_STATS}
+        for alert in self.alert_manager.alerts.values():
+            missing = sorted(
+                name for name in alert.inputs
+                if name.rsplit('_', 1)[-1] in self.AGGREGATE_STATS and name not in produced
+            )
+            if missing:
+                logger.warning(f"Alert {alert.id} reads aggregates that are never computed: {missing}")
     
     async def initialize(self, config: Dict[str, Any]):
         """Initialize monitoring system"""
@@ -496,130 +812,180 @@ class MonitoringSystem:
                 token=config.get('influxdb_token', ''),
                 org=config.get('influxdb_org', 'banking')
             )
+            self.write_api = self.influx_client.write_api(write_options=WriteOptions(
+                batch_size=500, flush_interval=1_000, jitter_interval=100
+            ))
         
         # Start background tasks
         self.tasks = [
-            asyncio.create_task(self._metrics_aggregator()),
-            asyncio.create_task(self._alert_evaluator()),
-            asyncio.create_task(self._anomaly_scanner()),
+            asyncio.create_task(self._scheduler()),
+            asyncio.create_task(self._loop_lag_probe()),
             asyncio.create_task(self.dashboard.start())
         ]
         
         self.running = True
         logger.info("Monitoring system initialized")
     
-    async def _metrics_aggregator(self):
-        """Aggregate metrics periodically"""
-        while self.running:
-            try:
-                await asyncio.sleep(10)  # Aggregate every 10 seconds
-                
-                # Get aggregated metrics
-                metrics = {
-                    'transaction_rate': self.collector.get_aggregated_metrics('transaction_rate'),
-                    'response_time': self.collector.get_aggregated_metrics('response_time'),
-                    'error_rate': self.collector.get_aggregated_metrics('error_rate'),
-                    'system_health': self._calculate_health_score()
-                }
-                
-                # Broadcast to dashboard
-                await self.dashboard.broadcast_metrics(metrics)
-                
-                # Store in InfluxDB
-                if self.influx_client:
-                    await self._store_metrics_influx(metrics)
-                
-            except Exception as e:
-                logger.error(f"Metrics aggregation error: {e}")
+    # Scheduler period, and how many periods between alert evaluations
+    # and between anomaly scans
+    TICK_SECONDS = 10
+    ALERT_EVERY = 3
+    ANOMALY_EVERY = 6
     
-    async def _alert_evaluator(self):
-        """Evaluate alerts periodically"""
+    async def _scheduler(self):
+        """Run aggregation, alert evaluation and anomaly scanning on one
+        clock, so alerts read the aggregates of the same tick"""
+        tick = 0
         while self.running:
-            try:
-                await asyncio.sleep(30)  # Evaluate every 30 seconds
-                
-                # Get current metrics
-                metrics = self._get_current_metrics()
-                
-                # Evaluate alerts
-                triggered = await self.alert_manager.evaluate_alerts(metrics)
-                
-                if triggered:
-                    logger.warning(f"Alerts triggered: {[a.id for a in triggered]}")
-                
-            except Exception as e:
-                logger.error(f"Alert evaluation error: {e}")
+            await asyncio.sleep(self.TICK_SECONDS)
+            tick += 1
+            
+            await self._aggregate_metrics()
+            if tick % self.ALERT_EVERY == 0:
+                await self._evaluate_alerts()
+            if tick % self.ANOMALY_EVERY == 0:
+                await self._scan_anomalies()
     
-    async def _anomaly_scanner(self):
-        """Scan for anomalies in metrics"""
+    # Event loop lag probe period, and the lag worth a warning
+    LAG_PROBE_SECONDS = 0.1
+    LAG_WARN_MS = 100
+    
+    async def _loop_lag_probe(self):
+        """Record how late the event loop wakes a short sleep, as
+        event_loop_lag_ms, to expose work blocking the loop"""
         while self.running:
-            try:
-                await asyncio.sleep(60)  # Scan every minute
+            start = time.monotonic_ns()
+            await asyncio.sleep(self.LAG_PROBE_SECONDS)
+            lag_ms = (time.monotonic_ns() - start) / 1e6 - self.LAG_PROBE_SECONDS * 1000
+            self.collector.record_fast('event_loop_lag_ms', lag_ms, time.time_ns())
+            if lag_ms > self.LAG_WARN_MS:
+                logger.warning(f"Event loop stalled for {lag_ms:.0f}ms")
+    
+    async def _aggregate_metrics(self):
+        """Aggregate metrics, publish them and cache them for this tick"""
+        try:
+            # Get aggregated metrics
+            metrics = {
+                name: self.collector.get_aggregated_metrics(name)
+                for name in self.AGGREGATED_METRICS
+            }
+            self._last_aggregated = dict(metrics)
+            self._last_aggregated_ns = time.monotonic_ns()
+            metrics['system_health'] = self._calculate_health_score()
+            
+            # Broadcast to dashboard
+            await self.dashboard.broadcast_metrics(metrics)
+            
+            # Store in InfluxDB
+            if self.influx_client:
+                await self._store_metrics_influx(metrics)
+            
+        except Exception as e:
+            logger.error(f"Metrics aggregation error: {e}")
+    
+    async def _evaluate_alerts(self):
+        """Evaluate alerts against current metrics"""
+        try:
+            # Get current metrics
+            metrics = self._get_current_metrics()
+            
+            # Evaluate alerts
+            triggered = await self.alert_manager.evaluate_alerts(metrics)
+            
+            if triggered:
+                logger.warning(f"Alerts triggered: {[a.id for a in triggered]}")
+            
+        except Exception as e:
+            logger.error(f"Alert evaluation error: {e}")
+    
+    async def _scan_anomalies(self):
+        """Scan metrics recorded since the last scan for anomalies"""
+        try:
+            # Check each metric's points since the last scan, one batch
+            # per metric
+            for metric_name, buffer in list(self.collector.buffers.items()):
+                # since() is a view into the live ring; copy it, as appends
+                # continue while the thread scores it
+                values = buffer.since(self._scanned_heads.get(metric_name, 0)).copy()
+                self._scanned_heads[metric_name] = buffer.head
+                if not values.size:
+                    continue
                 
-                # Check each metric for anomalies
-                for metric in self.collector.metrics_buffer:
-                    is_anomaly, score = self.anomaly_detector.detect_anomaly(
-                        metric.name, metric.value
+                # Scoring and forest refits are CPU work; keep them off the
+                # loop. Scans are sequential, so the detector is never
+                # used from two threads at once.
+                is_anomaly, scores = await asyncio.to_thread(
+                    self.anomaly_detector.detect_anomalies, metric_name, values
+                )
+                
+                for i in np.flatnonzero(is_anomaly):
+                    value = float(values[i])
+                    score = float(scores[i])
+                    logger.warning(
+                        f"Anomaly detected in {metric_name}: "
+                        f"value={value}, score={score:.2f}"
                     )
                     
-                    if is_anomaly:
-                        logger.warning(
-                            f"Anomaly detected in {metric.name}: "
-                            f"value={metric.value}, score={score:.2f}"
-                        )
-                        
-                        # Create alert for anomaly
-                        anomaly_alert = Alert(
-                            id=f"anomaly_{metric.name}",
-                            name=f"Anomaly in {metric.name}",
-                            description=f"Anomalous value detected: {metric.value}",
-                            severity=AlertSeverity.WARNING,
-                            condition="anomaly_detected",
-                            threshold=score,
-                            duration=0,
-                            cooldown=300,
-                            channels=["slack"]
-                        )
-                        
-                        await self.alert_manager._send_alert_notifications(
-                            anomaly_alert, 
-                            {'metric': metric.name, 'value': metric.value, 'score': score}
-                        )
-                
-            except Exception as e:
-                logger.error(f"Anomaly scanning error: {e}")
+                    # Create alert for anomaly
+                    anomaly_alert = Alert(
+                        id=f"anomaly_{metric_name}",
+                        name=f"Anomaly in {metric_name}",
+                        description=f"Anomalous value detected: {value}",
+                        severity=AlertSeverity.WARNING,
+                        condition="anomaly_detected",
+                        threshold=score,
+                        duration=0,
+                        cooldown=300,
+                        channels=["slack"]
+                    )
+                    
+                    await self.alert_manager._send_alert_notifications(
+                        anomaly_alert, 
+                        {'metric': metric_name, 'value': value, 'score': score}
+                    )
+            
+        except Exception as e:
+            logger.error(f"Anomaly scanning error: {e}")
     
     def _calculate_health_score(self) -> float:
         """Calculate overall system health score"""
         scores = []
         
+        # The aggregator's last 300s windows, unless they have gone stale
+        age_ns = time.monotonic_ns() - self._last_aggregated_ns
+        if age_ns <= self.collector.aggregation_window * 1_000_000_000:
+            aggregated = self._last_aggregated.get
+        else:
+            aggregated = lambda name: self.collector.get_aggregated_metrics(name, 300)
+        
         # Error rate component
-        error_metrics = self.collector.get_aggregated_metrics('error_rate', 300)
+        error_metrics = aggregated('error_rate')
         if error_metrics:
             error_score = max(0, 100 - (error_metrics['mean'] * 1000))
             scores.append(error_score)
         
         # Response time component
-        response_metrics = self.collector.get_aggregated_metrics('response_time', 300)
+        response_metrics = aggregated('response_time')
         if response_metrics:
             response_score = max(0, 100 - (response_metrics['p95'] / 10))
             scores.append(response_score)
         
         # Transaction rate component
-        tx_metrics = self.collector.get_aggregated_metrics('transaction_rate', 300)
+        tx_metrics = aggregated('transaction_rate')
         if tx_metrics:
             tx_score = min(100, tx_metrics['mean'] * 10)
             scores.append(tx_score)
         
-        return statistics.mean(scores) if scores else 100.0
+        return sum(scores) / len(scores) if scores else 100.0
     
     def _get_current_metrics(self) -> Dict[str, float]:
         """Get current metric values"""
-        metrics = {}
-        
-        # Get latest values from buffer
-        for metric in self.collector.metrics_buffer:
-            metrics[metric.name] = metric.value
+        # Latest value per metric, plus this tick's aggregates flattened to
+        # <metric>_<stat> (e.g. response_time_p95)
+        metrics = dict(self.collector.latest)
+        for name, stats in self._last_aggregated.items():
+            for stat, value in stats.items():
+                metrics[f"{name}_{stat}"] = value
         
         # Add calculated metrics
         metrics['system_health'] = self._calculate_health_score()
@@ -632,9 +998,11 @@ class MonitoringSystem:
             return
         
         try:
-            write_api = self.influx_client.write_api(write_options=SYNCHRONOUS)
-            
+            points: List[Point] = []
             for metric_name, metric_data in metrics.items():
+                if isinstance(metric_data, dict) and TDigest is not None:
+                    points.extend(self._sketch_points(metric_name))
+                    continue
                 if isinstance(metric_data, dict):
                     point = Point("banking_metrics") \
                         .tag("metric", metric_name) \
@@ -645,12 +1013,44 @@ class MonitoringSystem:
                     point = Point("banking_metrics") \
                         .tag("metric", metric_name) \
                         .field("value", metric_data)
-                
-                write_api.write(bucket="banking", record=point)
-                
+                points.append(point)
+            
+            # Queued for the batching writer's background flush; this
+            # doesn't wait on the network
+            self.write_api.write(bucket="banking", record=points)
+            
         except Exception as e:
             logger.error(f"InfluxDB write error: {e}")
     
+    def _sketch_points(self, metric_name: str) -> List[Point]:
+        """A point per completed, not yet stored, sketch bucket of a metric
+        
+        Each carries the bucket's t-digest centroids as base64 of a
+        [('mean', '<f8'), ('weight', '<f8')] array, so readers can merge
+        buckets over any range before taking percentiles, which
+        stored percentiles cannot be combined to do.
+        """
+        buffer = self.collector.buffers.get(metric_name)
+        if buffer is None:
+            return []
+        
+        current = time.time_ns() // SKETCH_BUCKET_NS
+        stored = self._stored_buckets.get(metric_name, -1)
+        points = []
+        for bucket, sketch in buffer.sketches:
+            if stored < bucket < current:
+                centroids = sketch.centroids()
+                points.append(
+                    Point("banking_metrics")
+                    .tag("metric", metric_name)
+                    .field("digest_b64", base64.b64encode(centroids.tobytes()).decode())
+                    .field("count", float(sketch.size()))
+                    .time(bucket * SKETCH_BUCKET_NS, WritePrecision.NS)
+                )
+                stored = bucket
+        self._stored_buckets[metric_name] = stored
+        return points
+    
     async def shutdown(self):
         """Shutdown monitoring system"""
         logger.info("Shutting down monitoring system")
@@ -660,7 +1060,9 @@ class MonitoringSystem:
         for task in self.tasks:
             task.cancel()
         
-        # Close InfluxDB client
+        # Flush pending points, then close InfluxDB client
+        if self.write_api:
+            self.write_api.close()
         if self.influx_client:
             self.influx_client.close()
         
@@ -6,30 +6,29 @@ Production-ready payment processing with multiple provider support
 
 import asyncio
 import httpx
-from cryptography.hazmat.primitives.ciphers import Cipher, algorithms, modes
-from cryptography.hazmat.backends import default_backend
+from cryptography.hazmat.primitives.ciphers.aead import AESGCM
 from cryptography.hazmat.primitives import hashes, hmac as crypto_hmac
 from cryptography.hazmat.primitives.kdf.pbkdf2 import PBKDF2
-import stripe
 import braintree
 from square.client import Client as SquareClient
 import adyen
 from paypalserversdk import PayPalServerSDKClient
 import structlog
-from typing import Dict, List, Optional, Any, Tuple
-from dataclasses import dataclass, field
-from decimal import Decimal
+from typing import Dict, List, Optional, Any, Tuple, Union
+from dataclasses import dataclass, field, asdict
+from decimal import Decimal, ROUND_HALF_UP
 from datetime import datetime, timezone
 from enum import Enum
 import uuid
-import json
+import os
+import orjson
 import base64
 import secrets
 from abc import ABC, abstractmethod
 import jwt
 import asyncpg
 from redis import asyncio as redis
-import hashlib
+import re
 
 logger = structlog.get_logger()
 
@@ -69,13 +68,68 @@ class CardBrand(Enum):
     UNIONPAY = "UNIONPAY"
 
 
-@dataclass
+class _UuidPool:
+    """Random version-4 UUIDs sliced from one os.urandom call per 1024 ids
+    
+    Not thread-safe; payments are created on the event loop thread.
+    """
+    
+    BATCH = 1024
+    
+    def __init__(self):
+        self.reset()
+    
+    def reset(self):
+        """Discard buffered randomness (a forked child must not reuse it)"""
+        self._buf = b''
+        self._i = 0
+    
+    def next_uuid(self) -> uuid.UUID:
+        i = self._i
+        if i >= len(self._buf):
+            self._buf = os.urandom(16 * self.BATCH)
+            i = 0
+        self._i = i + 16
+        return uuid.UUID(bytes=self._buf[i:i + 16], version=4)
+
+
+_uuid_pool = _UuidPool()
+next_uuid = _uuid_pool.next_uuid
+
+# Preforked workers would otherwise hand out the parent's buffered ids
+os.register_at_fork(after_in_child=_uuid_pool.reset)
+
+
+# Minor-unit exponents that differ from the usual 2: Stripe's
+# zero-decimal currencies and the ISO 4217 three-decimal ones
+CURRENCY_EXPONENTS: Dict[str, int] = {
+    **dict.fromkeys([
+        'BIF', 'CLP', 'DJF', 'GNF', 'JPY', 'KMF', 'KRW', 'MGA',
+        'PYG', 'RWF', 'UGX', 'VND', 'VUV', 'XAF', 'XOF', 'XPF'
+    ], 0),
+    **dict.fromkeys(['BHD', 'IQD', 'JOD', 'KWD', 'LYD', 'OMR', 'TND'], 3)
+}
+
+_ONE = Decimal(1)
+
+
+def to_minor_units(amount: Union[Decimal, int, float, str], currency: str) -> int:
+    """Convert a major-unit amount to integer minor units, rounding half up"""
+    if not isinstance(amount, Decimal):
+        # str() so 12.1 becomes Decimal('12.1'), not its binary expansion
+        amount = Decimal(str(amount))
+    exponent = CURRENCY_EXPONENTS.get(currency.upper(), 2)
+    return int(amount.scaleb(exponent).quantize(_ONE, rounding=ROUND_HALF_UP))
+
+
+@dataclass(slots=True)
 class PaymentRequest:
     """Payment request with full details"""
-    id: str = field(default_factory=lambda: str(uuid.uuid4()))
+    id: uuid.UUID = field(default_factory=next_uuid)
     amount: Decimal = Decimal('0')
     currency: str = "USD"
     method: PaymentMethod = PaymentMethod.CARD
+    amount_minor: int = 0  # Derived from amount unless given
     
     # Card details (encrypted)
     card_number: Optional[str] = None
@@ -113,16 +167,22 @@ class PaymentRequest:
     device_fingerprint: str = ""
     
     # Idempotency
-    idempotency_key: str = field(default_factory=lambda: str(uuid.uuid4()))
+    idempotency_key: str = field(default_factory=lambda: str(next_uuid()))
     
     # Timestamps
     created_at: datetime = field(default_factory=lambda: datetime.now(timezone.utc))
+    
+    def __post_init__(self):
+        if not isinstance(self.amount, Decimal):
+            self.amount = Decimal(str(self.amount))
+        if not self.amount_minor and self.amount:
+            self.amount_minor = to_minor_units(self.amount, self.currency)
 
 
-@dataclass
+@dataclass(slots=True)
 class PaymentResponse:
     """Payment processing response"""
-    request_id: str
+    request_id: uuid.UUID
     transaction_id: str
     status: PaymentStatus
     provider: str
@@ -171,12 +231,12 @@ class PaymentProvider(ABC):
         pass
     
     @abstractmethod
-    async def capture_payment(self, transaction_id: str, amount: Optional[Decimal] = None) -> bool:
+    async def capture_payment(self, transaction_id: str, amount_minor: Optional[int] = None) -> bool:
         """Capture an authorized payment"""
         pass
     
     @abstractmethod
-    async def refund_payment(self, transaction_id: str, amount: Optional[Decimal] = None) -> bool:
+    async def refund_payment(self, transaction_id: str, amount_minor: Optional[int] = None) -> bool:
         """Refund a payment"""
         pass
     
@@ -186,112 +246,142 @@ class PaymentProvider(ABC):
         pass
 
 
+def _stripe_form(params: Dict[str, Any], prefix: str = '') -> Dict[str, Any]:
+    """Flatten nested params into Stripe's form encoding (card[number]=...)"""
+    form: Dict[str, Any] = {}
+    for key, value in params.items():
+        name = f"{prefix}[{key}]" if prefix else key
+        if value is None:
+            continue
+        if isinstance(value, dict):
+            form.update(_stripe_form(value, name))
+        elif isinstance(value, list):
+            form[f"{name}[]"] = value
+        elif isinstance(value, bool):
+            form[name] = 'true' if value else 'false'
+        else:
+            form[name] = value
+    return form
+
+
 class StripeProvider(PaymentProvider):
-    """Stripe payment provider implementation"""
+    """Stripe payment provider implementation
+    
+    Talks to the Stripe REST API over the gateway's shared HTTP client
+    rather than the blocking SDK, so calls neither stall the event loop
+    nor reconnect.
+    """
     
-    def __init__(self, api_key: str, webhook_secret: str):
-        stripe.api_key = api_key
+    API_BASE = "https://api.stripe.com"
+    
+    def __init__(self, api_key: str, webhook_secret: str, http_client: httpx.AsyncClient):
         self.webhook_secret = webhook_secret
-        self.client = httpx.AsyncClient()
+        self.auth = httpx.BasicAuth(api_key, "")
+        self.client = http_client
+    
+    async def _post(self, path: str, params: Dict[str, Any],
+                    idempotency_key: Optional[str] = None) -> httpx.Response:
+        headers = {'Idempotency-Key': idempotency_key} if idempotency_key else None
+        return await self.client.post(
+            self.API_BASE + path, data=_stripe_form(params), headers=headers, auth=self.auth
+        )
     
     async def process_payment(self, request: PaymentRequest) -> PaymentResponse:
         """Process payment through Stripe"""
         try:
-            # Create payment intent
-            intent = stripe.PaymentIntent.create(
-                amount=int(request.amount * 100),  # Convert to cents
-                currency=request.currency.lower(),
-                customer=request.customer_id if request.customer_id else None,
-                description=request.description,
-                statement_descriptor=request.statement_descriptor[:22] if request.statement_descriptor else None,
-                metadata=request.metadata,
-                capture_method='manual',  # Authorize first, capture later
-                payment_method_types=['card'],
-                receipt_email=request.customer_email
-            )
-            
             # Create payment method
+            payment_method_id = None
             if request.card_number:
-                payment_method = stripe.PaymentMethod.create(
-                    type='card',
-                    card={
+                response = await self._post('/v1/payment_methods', {
+                    'type': 'card',
+                    'card': {
                         'number': request.card_number,
                         'exp_month': int(request.card_expiry.split('/')[0]),
                         'exp_year': int(request.card_expiry.split('/')[1]),
                         'cvc': request.card_cvv
                     },
-                    billing_details={
+                    'billing_details': {
                         'address': request.billing_address,
                         'email': request.customer_email,
                         'name': request.card_holder,
                         'phone': request.customer_phone
                     }
-                )
-                
-                # Attach payment method to intent
-                stripe.PaymentIntent.modify(
-                    intent.id,
-                    payment_method=payment_method.id
-                )
+                }, f"{request.idempotency_key}:pm")
+                if response.status_code == 402:
+                    return self._card_error(request, response)
+                response.raise_for_status()
+                payment_method_id = response.json()['id']
             
-            # Confirm payment (authorize)
-            confirmed = stripe.PaymentIntent.confirm(
-                intent.id,
-                return_url='https://example.com/return'
-            )
+            # Create, attach and confirm (authorize) the intent in one call
+            response = await self._post('/v1/payment_intents', {
+                'amount': request.amount_minor,
+                'currency': request.currency.lower(),
+                'customer': request.customer_id or None,
+                'description': request.description,
+                'statement_descriptor': request.statement_descriptor[:22] or None,
+                'metadata': request.metadata,
+                'capture_method': 'manual',  # Authorize first, capture later
+                'payment_method_types': ['card'],
+                'receipt_email': request.customer_email or None,
+                'payment_method': payment_method_id,
+                'confirm': True,
+                'return_url': 'https://example.com/return'
+            }, request.idempotency_key)
+            if response.status_code == 402:
+                return self._card_error(request, response)
+            response.raise_for_status()
+            confirmed = response.json()
             
             # Build response
             return PaymentResponse(
                 request_id=request.id,
-                transaction_id=confirmed.id,
-                status=PaymentStatus.AUTHORIZED if confirmed.status == 'requires_capture' else PaymentStatus.FAILED,
+                transaction_id=confirmed['id'],
+                status=PaymentStatus.AUTHORIZED if confirmed['status'] == 'requires_capture' else PaymentStatus.FAILED,
                 provider='stripe',
-                provider_transaction_id=confirmed.id,
-                authorization_code=confirmed.charges.data[0].id if confirmed.charges.data else None,
+                provider_transaction_id=confirmed['id'],
+                authorization_code=confirmed.get('latest_charge'),
                 fraud_score=0.0,  # Would get from Stripe Radar
                 authorized_at=datetime.now(timezone.utc)
             )
             
-        except stripe.error.CardError as e:
-            return PaymentResponse(
-                request_id=request.id,
-                transaction_id='',
-                status=PaymentStatus.FAILED,
-                provider='stripe',
-                provider_transaction_id='',
-                error_code=e.code,
-                error_message=str(e),
-                decline_reason=e.decline_code
-            )
         except Exception as e:
             logger.error(f"Stripe payment error: {e}")
             raise
     
-    async def capture_payment(self, transaction_id: str, amount: Optional[Decimal] = None) -> bool:
+    @staticmethod
+    def _card_error(request: PaymentRequest, response: httpx.Response) -> PaymentResponse:
+        """Failed response for a Stripe card error (HTTP 402)"""
+        error = response.json().get('error', {})
+        return PaymentResponse(
+            request_id=request.id,
+            transaction_id='',
+            status=PaymentStatus.FAILED,
+            provider='stripe',
+            provider_transaction_id='',
+            error_code=error.get('code'),
+            error_message=error.get('message'),
+            decline_reason=error.get('decline_code')
+        )
+    
+    async def capture_payment(self, transaction_id: str, amount_minor: Optional[int] = None) -> bool:
         """Capture Stripe payment"""
         try:
-            if amount:
-                stripe.PaymentIntent.capture(
-                    transaction_id,
-                    amount_to_capture=int(amount * 100)
-                )
-            else:
-                stripe.PaymentIntent.capture(transaction_id)
+            params = {'amount_to_capture': amount_minor} if amount_minor else {}
+            response = await self._post(f'/v1/payment_intents/{transaction_id}/capture', params)
+            response.raise_for_status()
             return True
         except Exception as e:
             logger.error(f"Stripe capture error: {e}")
             return False
     
-    async def refund_payment(self, transaction_id: str, amount: Optional[Decimal] = None) -> bool:
+    async def refund_payment(self, transaction_id: str, amount_minor: Optional[int] = None) -> bool:
         """Refund Stripe payment"""
         try:
-            if amount:
-                stripe.Refund.create(
-                    payment_intent=transaction_id,
-                    amount=int(amount * 100)
-                )
-            else:
-                stripe.Refund.create(payment_intent=transaction_id)
+            params: Dict[str, Any] = {'payment_intent': transaction_id}
+            if amount_minor:
+                params['amount'] = amount_minor
+            response = await self._post('/v1/refunds', params)
+            response.raise_for_status()
             return True
         except Exception as e:
             logger.error(f"Stripe refund error: {e}")
@@ -300,7 +390,11 @@ class StripeProvider(PaymentProvider):
     async def get_transaction_status(self, transaction_id: str) -> PaymentStatus:
         """Get Stripe transaction status"""
         try:
-            intent = stripe.PaymentIntent.retrieve(transaction_id)
+            response = await self.client.get(
+                f'{self.API_BASE}/v1/payment_intents/{transaction_id}', auth=self.auth
+            )
+            response.raise_for_status()
+            intent = response.json()
             status_map = {
                 'requires_payment_method': PaymentStatus.PENDING,
                 'requires_confirmation': PaymentStatus.PENDING,
@@ -310,7 +404,7 @@ class StripeProvider(PaymentProvider):
                 'succeeded': PaymentStatus.CAPTURED,
                 'canceled': PaymentStatus.CANCELLED
             }
-            return status_map.get(intent.status, PaymentStatus.FAILED)
+            return status_map.get(intent['status'], PaymentStatus.FAILED)
         except Exception as e:
             logger.error(f"Stripe status check error: {e}")
             return PaymentStatus.FAILED
@@ -321,13 +415,19 @@ class TokenizationService:
     
     def __init__(self, encryption_key: bytes):
         self.encryption_key = encryption_key
-        self.backend = default_backend()
+        # Keeps the expanded key schedule; OpenSSL uses AES-NI/PCLMULQDQ
+        self._aead = AESGCM(encryption_key)
+    
+    @staticmethod
+    def validate_card(card_number: str):
+        """Reject card numbers that cannot be tokenized"""
+        if len(card_number) < 13:
+            raise ValueError("Invalid card number")
     
     def tokenize_card(self, card_number: str) -> str:
         """Tokenize card number using format-preserving encryption"""
         # Generate token that preserves format (first 6, last 4 visible)
-        if len(card_number) < 13:
-            raise ValueError("Invalid card number")
+        self.validate_card(card_number)
         
         # Keep first 6 and last 4
         first_six = card_number[:6]
@@ -341,7 +441,7 @@ class TokenizationService:
         token = f"{first_six}{encrypted_middle}{last_four}"
         
         # Store mapping in secure vault
-        token_id = str(uuid.uuid4())
+        token_id = str(next_uuid())
         # Would store token->card mapping in HSM or secure vault
         
         return token_id
@@ -351,18 +451,11 @@ class TokenizationService:
         # Generate nonce
         nonce = secrets.token_bytes(12)
         
-        # Create cipher
-        cipher = Cipher(
-            algorithms.AES(self.encryption_key),
-            modes.GCM(nonce),
-            backend=self.backend
-        )
-        
-        encryptor = cipher.encryptor()
-        ciphertext = encryptor.update(plaintext.encode()) + encryptor.finalize()
+        # Ciphertext carries the 16-byte tag appended
+        ciphertext = self._aead.encrypt(nonce, plaintext.encode(), None)
         
         # Return base64 encoded
-        return base64.b64encode(nonce + encryptor.tag + ciphertext).decode()
+        return base64.b64encode(nonce + ciphertext).decode()
     
     def detokenize(self, token: str) -> str:
         """Retrieve original card number from token"""
@@ -376,15 +469,11 @@ class TokenizationService:
             # Decrypt token to get original card number
             try:
                 data = base64.b64decode(token.encode())
-                if len(data) < 32:  # nonce(12) + tag(16) + min_ciphertext(4)
+                if len(data) < 32:  # nonce(12) + min_ciphertext(4) + tag(16)
                     raise ValueError("Token data too short")
                 
                 nonce = data[:12]
-                tag = data[12:28]
-                ciphertext = data[28:]
-                
-                cipher = AES.new(self.encryption_key, AES.MODE_GCM, nonce=nonce)
-                original_card = cipher.decrypt_and_verify(ciphertext, tag).decode()
+                original_card = self._aead.decrypt(nonce, data[12:], None).decode()
                 return original_card
                 
             except Exception as e:
@@ -402,6 +491,10 @@ class FraudDetectionService:
     def __init__(self, redis_client: redis.Redis):
         self.redis = redis_client
         self.rules = self._load_fraud_rules()
+        
+        # One alternation over all suspicious-email markers
+        email_patterns = next(rule['patterns'] for rule in self.rules if rule['name'] == 'suspicious_email')
+        self._email_re = re.compile("|".join(map(re.escape, email_patterns)), re.IGNORECASE)
     
     def _load_fraud_rules(self) -> List[Dict]:
         """Load fraud detection rules"""
@@ -410,7 +503,7 @@ class FraudDetectionService:
             {'name': 'amount', 'threshold': 10000, 'severity': 'high'},  # Large amounts
             {'name': 'country_mismatch', 'severity': 'medium'},  # Billing/IP country mismatch
             {'name': 'new_device', 'severity': 'low'},  # First time device
-            {'name': 'suspicious_email', 'patterns': ['temp', 'disposable'], 'severity': 'medium'}
+            {'name': 'suspicious_email', 'patterns': ['temp', 'disposable', 'mailinator', 'guerrilla', 'yopmail'], 'severity': 'medium'}
         ]
     
     async def check_transaction(self, request: PaymentRequest) -> Tuple[float, str, List[str]]:
@@ -418,11 +511,17 @@ class FraudDetectionService:
         score = 0.0
         risk_factors = []
         
-        # Velocity check
+        # Velocity and device lookups share one round trip; SET NX only
+        # succeeds for a device not seen in the last 30 days
         velocity_key = f"velocity:{request.customer_id}"
-        current_count = await self.redis.incr(velocity_key)
-        await self.redis.expire(velocity_key, 300)
+        device_key = f"device:{request.device_fingerprint}"
+        async with self.redis.pipeline(transaction=False) as pipe:
+            pipe.incr(velocity_key)
+            pipe.expire(velocity_key, 300)
+            pipe.set(device_key, "1", ex=86400 * 30, nx=True)
+            current_count, _, new_device = await pipe.execute()
         
+        # Velocity check
         if current_count > 5:
             score += 0.3
             risk_factors.append("high_velocity")
@@ -433,18 +532,14 @@ class FraudDetectionService:
             risk_factors.append("large_amount")
         
         # Email check
-        if any(pattern in request.customer_email.lower() for pattern in ['temp', 'disposable']):
+        if self._email_re.search(request.customer_email):
             score += 0.2
             risk_factors.append("suspicious_email")
         
         # Device fingerprint check
-        device_key = f"device:{request.device_fingerprint}"
-        device_seen = await self.redis.exists(device_key)
-        
-        if not device_seen:
+        if new_device:
             score += 0.1
             risk_factors.append("new_device")
-            await self.redis.setex(device_key, 86400 * 30, "1")  # Remember for 30 days
         
         # Determine decision
         if score >= 0.7:
@@ -457,9 +552,38 @@ class FraudDetectionService:
         return min(score, 1.0), decision, risk_factors
 
 
+class PaymentConnection(asyncpg.Connection):
+    """Pool connection carrying its prepared statements
+    
+    Filled in by PaymentGateway._prepare_statements whenever the pool
+    opens a connection, so reconnects re-prepare automatically.
+    """
+    
+    __slots__ = ('insert_payment',)
+    
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.insert_payment: Optional[asyncpg.prepared_stmt.PreparedStatement] = None
+
+
 class PaymentGateway:
     """Main payment gateway orchestrator"""
     
+    INSERT_PAYMENT_SQL = '''
+        INSERT INTO payments (
+            id, customer_id, amount_minor, currency, method, status,
+            provider, provider_transaction_id, authorization_code,
+            fraud_score, fraud_decision, risk_factors, metadata,
+            authorized_at, captured_at
+        ) VALUES ($1, $2, $3, $4, $5, $6, $7, $8, $9, $10, $11, $12, $13, $14, $15)
+    '''
+    
+    # Background persistence
+    WRITE_QUEUE_SIZE = 10_000
+    WRITERS = 4
+    WRITE_BATCH = 500
+    WRITE_LINGER = 0.05  # seconds a writer waits to fill a batch
+    
     def __init__(self, config: Dict[str, Any]):
         self.config = config
         self.providers: Dict[str, PaymentProvider] = {}
@@ -467,6 +591,9 @@ class PaymentGateway:
         self.fraud_detector: Optional[FraudDetectionService] = None
         self.db_pool: Optional[asyncpg.Pool] = None
         self.redis: Optional[redis.Redis] = None
+        self.http_client: Optional[httpx.AsyncClient] = None
+        self._write_queue: asyncio.Queue = asyncio.Queue(maxsize=self.WRITE_QUEUE_SIZE)
+        self._writers: List[asyncio.Task] = []
         
         # Payment routing rules
         self.routing_rules = {
@@ -475,16 +602,28 @@ class PaymentGateway:
             'UK': ['stripe', 'adyen'],
             'default': ['stripe']
         }
+        # Country -> first configured provider, resolved in initialize()
+        self._routes: Dict[str, Optional[PaymentProvider]] = {}
     
     async def initialize(self):
         """Initialize payment gateway"""
         logger.info("Initializing payment gateway")
         
+        # Create database schema first; pool connections prepare
+        # statements against it as they open
+        conn = await asyncpg.connect(self.config['database_url'])
+        try:
+            await self._create_schema(conn)
+        finally:
+            await conn.close()
+        
         # Initialize database
         self.db_pool = await asyncpg.create_pool(
             self.config['database_url'],
             min_size=10,
-            max_size=50
+            max_size=50,
+            connection_class=PaymentConnection,
+            init=self._prepare_statements
         )
         
         # Initialize Redis
@@ -497,59 +636,107 @@ class PaymentGateway:
         # Initialize fraud detection
         self.fraud_detector = FraudDetectionService(self.redis)
         
+        # One pooled HTTP client shared by every payment provider
+        self.http_client = httpx.AsyncClient(
+            limits=httpx.Limits(max_keepalive_connections=100, max_connections=1000),
+            timeout=httpx.Timeout(10.0, connect=5.0),
+            http2=True
+        )
+        
         # Initialize payment providers
         if 'stripe' in self.config['providers']:
             self.providers['stripe'] = StripeProvider(
                 self.config['providers']['stripe']['api_key'],
-                self.config['providers']['stripe']['webhook_secret']
+                self.config['providers']['stripe']['webhook_secret'],
+                http_client=self.http_client
             )
         
         # Would initialize other providers similarly
         
-        # Create database schema
-        await self._create_schema()
+        self._routes = {
+            country: next((self.providers[name] for name in names if name in self.providers), None)
+            for country, names in self.routing_rules.items()
+        }
+        
+        # Persist payments off the request path
+        self._writers = [asyncio.create_task(self._drain_writes()) for _ in range(self.WRITERS)]
         
         logger.info("Payment gateway initialized")
     
-    async def _create_schema(self):
+    async def _create_schema(self, conn: asyncpg.Connection):
         """Create database schema"""
-        async with self.db_pool.acquire() as conn:
-            await conn.execute('''
-                CREATE TABLE IF NOT EXISTS payments (
-                    id UUID PRIMARY KEY,
-                    customer_id VARCHAR(100),
-                    amount DECIMAL(20, 4),
-                    currency VARCHAR(3),
-                    method VARCHAR(20),
-                    status VARCHAR(20),
-                    provider VARCHAR(50),
-                    provider_transaction_id VARCHAR(200),
-                    authorization_code VARCHAR(100),
-                    fraud_score FLOAT,
-                    fraud_decision VARCHAR(20),
-                    risk_factors JSONB,
-                    metadata JSONB,
-                    created_at TIMESTAMPTZ DEFAULT NOW(),
-                    updated_at TIMESTAMPTZ DEFAULT NOW(),
-                    authorized_at TIMESTAMPTZ,
-                    captured_at TIMESTAMPTZ,
-                    settled_at TIMESTAMPTZ
-                );
-                
-                CREATE INDEX IF NOT EXISTS idx_payments_customer ON payments(customer_id);
-                CREATE INDEX IF NOT EXISTS idx_payments_status ON payments(status);
-                CREATE INDEX IF NOT EXISTS idx_payments_created ON payments(created_at DESC);
-            ''')
+        await conn.execute('''
+            CREATE TABLE IF NOT EXISTS payments (
+                id UUID PRIMARY KEY,
+                customer_id VARCHAR(100),
+                amount_minor BIGINT,
+                currency VARCHAR(3),
+                method VARCHAR(20),
+                status VARCHAR(20),
+                provider VARCHAR(50),
+                provider_transaction_id VARCHAR(200),
+                authorization_code VARCHAR(100),
+                fraud_score FLOAT,
+                fraud_decision VARCHAR(20),
+                risk_factors JSONB,
+                metadata JSONB,
+                created_at TIMESTAMPTZ DEFAULT NOW(),
+                updated_at TIMESTAMPTZ DEFAULT NOW(),
+                authorized_at TIMESTAMPTZ,
+                captured_at TIMESTAMPTZ,
+                settled_at TIMESTAMPTZ
+            );
+            
+            CREATE INDEX IF NOT EXISTS idx_payments_customer ON payments(customer_id);
+            CREATE INDEX IF NOT EXISTS idx_payments_status ON payments(status);
+            CREATE INDEX IF NOT EXISTS idx_payments_created ON payments(created_at DESC);
+        ''')
+        
+        # Tables created before amounts moved to minor units have a
+        # DECIMAL amount column; add amount_minor and backfill it
+        exponent = ' '.join(
+            f"WHEN '{code}' THEN {exp}" for code, exp in CURRENCY_EXPONENTS.items()
+        )
+        await conn.execute(f'''
+            ALTER TABLE payments ADD COLUMN IF NOT EXISTS amount_minor BIGINT;
+            
+            DO $$
+            BEGIN
+                IF EXISTS (
+                    SELECT 1 FROM information_schema.columns
+                    WHERE table_schema = current_schema()
+                    AND table_name = 'payments' AND column_name = 'amount'
+                ) THEN
+                    UPDATE payments
+                    SET amount_minor = ROUND(amount * POWER(10::NUMERIC, CASE UPPER(currency) {exponent} ELSE 2 END))
+                    WHERE amount_minor IS NULL AND amount IS NOT NULL;
+                END IF;
+            END $$;
+        ''')
     
     async def process_payment(self, request: PaymentRequest) -> PaymentResponse:
         """Process payment through appropriate provider"""
         try:
-            # Tokenize sensitive data
+            # Reject malformed cards before the fraud check counts them
+            # against velocity and device history
             if request.card_number:
-                request.card_number = self.tokenizer.tokenize_card(request.card_number)
+                self.tokenizer.validate_card(request.card_number)
+            
+            # Fraud check; its Redis round trip overlaps tokenization
+            fraud_check = asyncio.create_task(self.fraud_detector.check_transaction(request))
+            await asyncio.sleep(0)  # let the check put its pipeline on the wire
             
-            # Fraud check
-            fraud_score, fraud_decision, risk_factors = await self.fraud_detector.check_transaction(request)
+            # Tokenize sensitive data. The pipeline is already on the wire,
+            # so it is awaited rather than cancelled on failure: cancelling
+            # could leave an unread reply on a pooled Redis connection
+            try:
+                if request.card_number:
+                    request.card_number = self.tokenizer.tokenize_card(request.card_number)
+            except Exception:
+                await asyncio.gather(fraud_check, return_exceptions=True)
+                raise
+            
+            fraud_score, fraud_decision, risk_factors = await fraud_check
             
             if fraud_decision == "BLOCK":
                 return PaymentResponse(
@@ -579,8 +766,8 @@ class PaymentGateway:
             response.fraud_decision = fraud_decision
             response.risk_factors = risk_factors
             
-            # Store in database
-            await self._store_payment(request, response)
+            # Store in database (batched in the background)
+            await self._enqueue_payment(request, response)
             
             # Manual review if needed
             if fraud_decision == "REVIEW":
@@ -605,54 +792,106 @@ class PaymentGateway:
         # Get country from IP or billing address
         country = request.billing_address.get('country', 'US')
         
-        # Get provider list for country
-        provider_list = self.routing_rules.get(country, self.routing_rules['default'])
-        
-        # Return first available provider
-        for provider_name in provider_list:
-            if provider_name in self.providers:
-                return self.providers[provider_name]
-        
-        return None
+        # First available provider for the country, precomputed at startup
+        return self._routes.get(country, self._routes['default'])
+    
+    @staticmethod
+    def _payment_record(request: PaymentRequest, response: PaymentResponse) -> Tuple:
+        """Row for INSERT_PAYMENT_SQL"""
+        return (
+            request.id,
+            request.customer_id,
+            request.amount_minor,
+            request.currency,
+            request.method.value,
+            response.status.value,
+            response.provider,
+            response.provider_transaction_id,
+            response.authorization_code,
+            response.fraud_score,
+            response.fraud_decision,
+            orjson.dumps(response.risk_factors).decode(),
+            orjson.dumps(request.metadata, default=str).decode(),
+            response.authorized_at,
+            response.captured_at
+        )
+    
+    async def _prepare_statements(self, conn: 'PaymentConnection'):
+        """Pool init hook: prepare the payments INSERT on a new connection"""
+        conn.insert_payment = await conn.prepare(self.INSERT_PAYMENT_SQL)
+    
+    async def _enqueue_payment(self, request: PaymentRequest, response: PaymentResponse):
+        """Hand the payment to the background writers, or store it inline when they are backed up"""
+        record = self._payment_record(request, response)
+        try:
+            self._write_queue.put_nowait(record)
+        except asyncio.QueueFull:
+            await self._store_payment(record)
     
-    async def _store_payment(self, request: PaymentRequest, response: PaymentResponse):
+    async def _store_payment(self, record: Tuple):
         """Store payment in database"""
         async with self.db_pool.acquire() as conn:
-            await conn.execute('''
-                INSERT INTO payments (
-                    id, customer_id, amount, currency, method, status,
-                    provider, provider_transaction_id, authorization_code,
-                    fraud_score, fraud_decision, risk_factors, metadata,
-                    authorized_at, captured_at
-                ) VALUES ($1, $2, $3, $4, $5, $6, $7, $8, $9, $10, $11, $12, $13, $14, $15)
-            ''',
-                uuid.UUID(request.id),
-                request.customer_id,
-                request.amount,
-                request.currency,
-                request.method.value,
-                response.status.value,
-                response.provider,
-                response.provider_transaction_id,
-                response.authorization_code,
-                response.fraud_score,
-                response.fraud_decision,
-                json.dumps(response.risk_factors),
-                json.dumps(request.metadata),
-                response.authorized_at,
-                response.captured_at
-            )
+            await conn.insert_payment.fetch(*record)
+    
+    async def _drain_writes(self):
+        """Write queued payments in batches of up to WRITE_BATCH rows"""
+        loop = asyncio.get_running_loop()
+        while True:
+            batch = [await self._write_queue.get()]
+            deadline = loop.time() + self.WRITE_LINGER
+            while len(batch) < self.WRITE_BATCH:
+                try:
+                    batch.append(self._write_queue.get_nowait())
+                    continue
+                except asyncio.QueueEmpty:
+                    pass
+                remaining = deadline - loop.time()
+                if remaining <= 0:
+                    break
+                try:
+                    batch.append(await asyncio.wait_for(self._write_queue.get(), remaining))
+                except asyncio.TimeoutError:
+                    break
+            
+            try:
+                async with self.db_pool.acquire() as conn:
+                    await conn.insert_payment.executemany(batch)
+            except Exception as e:
+                # Retry row by row so one bad payment does not drop the batch
+                logger.error(f"Payment batch write failed: {e}")
+                for record in batch:
+                    try:
+                        await self._store_payment(record)
+                    except Exception as e:
+                        logger.error(f"Failed to store payment {record[0]}: {e}")
+            finally:
+                for _ in batch:
+                    self._write_queue.task_done()
     
     async def _queue_for_review(self, request: PaymentRequest, response: PaymentResponse):
         """Queue transaction for manual review"""
         review_data = {
-            'request': request.__dict__,
-            'response': response.__dict__,
+            'request': asdict(request),
+            'response': asdict(response),
             'timestamp': datetime.now(timezone.utc).isoformat()
         }
         
-        await self.redis.lpush('payment_review_queue', json.dumps(review_data, default=str))
+        await self.redis.lpush('payment_review_queue', orjson.dumps(review_data, default=str))
         logger.info(f"Payment {request.id} queued for manual review")
+    
+    async def shutdown(self):
+        """Flush pending payments, then close HTTP, Redis and database connections"""
+        if self._writers:
+            await self._write_queue.join()
+            for writer in self._writers:
+                writer.cancel()
+            await asyncio.gather(*self._writers, return_exceptions=True)
+        if self.http_client:
+            await self.http_client.aclose()
+        if self.redis:
+            await self.redis.close()
+        if self.db_pool:
+            await self.db_pool.close()
 
 
 async def main():